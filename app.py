@@ -1,5 +1,79 @@
-from .crnn import crnn_mobilenet_v3_large
+from functools import lru_cache
+from typing import Callable, Optional
+import logging
 
-def execute():
-  model = crnn_mobilenet_v3_large(pretrained=True, exportable=True)
-  return model
\ No newline at end of file
+import tensorflow as tf
+
+from .crnn import crnn_mobilenet_v3_large, crnn_vgg16_bn
+
+_ARCHS = {
+  "crnn_mobilenet_v3_large": crnn_mobilenet_v3_large,
+  "crnn_vgg16_bn": crnn_vgg16_bn,
+}
+
+@lru_cache(maxsize=4)
+def _load_model(arch: str, pretrained: bool):
+  # Build (and download weights for) each architecture only once per process
+  return _ARCHS[arch](pretrained=pretrained, exportable=True)
+
+def _serving_fn(model):
+  # XLA-compiled inference signature, so the SavedModel does not need re-optimizing on first call
+  @tf.function(jit_compile=True, input_signature=[tf.TensorSpec([None, *model.cfg["input_shape"]], tf.float32)])
+  def serve(x):
+    return model(x, training=False)
+  return serve
+
+def _export_tflite(model, output_path: str, representative_dataset: Optional[Callable] = None) -> None:
+  # Full integer quantization: calibration should use real (normalized) text crops
+  cfg = model.cfg
+  if representative_dataset is None:
+    logging.warning("No representative dataset provided, calibrating int8 quantization on random images.")
+
+    def representative_dataset():
+      for _ in range(100):
+        x = tf.random.uniform([1, *cfg["input_shape"]], maxval=1, dtype=tf.float32)
+        yield [(x - cfg["mean"]) / cfg["std"]]
+
+  # Convert a plain (non-XLA) trace of the model rather than the jit-compiled serving signature
+  concrete_fn = tf.function(lambda x: model(x, training=False)).get_concrete_function(
+    tf.TensorSpec([1, *cfg["input_shape"]], tf.float32)
+  )
+  converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_fn], model)
+  converter.optimizations = [tf.lite.Optimize.DEFAULT]
+  converter.representative_dataset = representative_dataset
+  converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+  converter.inference_input_type = tf.int8
+  with open(f"{output_path}.tflite", "wb") as f:
+    f.write(converter.convert())
+
+def execute(
+  output_path: Optional[str] = None,
+  quantize: bool = False,
+  arch: str = "crnn_mobilenet_v3_large",
+  pretrained: bool = True,
+  representative_dataset: Optional[Callable] = None,
+):
+  """Build a recognition model, and optionally export it
+
+  Args:
+  ----
+    output_path: if set, directory where the SavedModel is written
+    quantize: if True, also writes an int8 TFLite model to `<output_path>.tflite`
+    arch: name of the recognition architecture
+    pretrained: whether pretrained weights should be loaded
+    representative_dataset: callable yielding `[sample]` lists of normalized float32 inputs of shape
+      (1, H, W, C), used to calibrate the int8 quantization (random images otherwise)
+
+  Returns:
+  -------
+    the model
+  """
+  model = _load_model(arch, pretrained)
+  if output_path is not None:
+    # Single eager pass so that all the model variables are created before saving
+    _ = model(tf.zeros([1, *model.cfg["input_shape"]], dtype=tf.float32), training=False)
+    tf.saved_model.save(model, output_path, signatures={"serving_default": _serving_fn(model)})
+    if quantize:
+      # Secondary int8 TFLite export, written next to the SavedModel
+      _export_tflite(model, output_path, representative_dataset)
+  return model
@@ -45,23 +45,31 @@ VOCABS["vietnamese"] = (
     + "ÁÀẢẠÃĂẮẰẲẴẶÂẤẦẨẪẬÉÈẺẼẸÊẾỀỂỄỆÓÒỎÕỌÔỐỒỔỘỖƠỚỜỞỢỠÚÙỦŨỤƯỨỪỬỮỰIÍÌỈĨỊÝỲỶỸỴ"
 )
 VOCABS["hebrew"] = VOCABS["english"] + "אבגדהוזחטיכלמנסעפצקרשת" + "₪"
-VOCABS["multilingual"] = "".join(
-    dict.fromkeys(
-        VOCABS["french"]
-        + VOCABS["portuguese"]
-        + VOCABS["spanish"]
-        + VOCABS["german"]
-        + VOCABS["czech"]
-        + VOCABS["polish"]
-        + VOCABS["dutch"]
-        + VOCABS["italian"]
-        + VOCABS["norwegian"]
-        + VOCABS["danish"]
-        + VOCABS["finnish"]
-        + VOCABS["swedish"]
-        + "§"
-    )
+_multilingual_sources = (
+    VOCABS["french"],
+    VOCABS["portuguese"],
+    VOCABS["spanish"],
+    VOCABS["german"],
+    VOCABS["czech"],
+    VOCABS["polish"],
+    VOCABS["dutch"],
+    VOCABS["italian"],
+    VOCABS["norwegian"],
+    VOCABS["danish"],
+    VOCABS["finnish"],
+    VOCABS["swedish"],
+    "§",
 )
+# Ordered deduplication in a single pass, without building the concatenated string
+_seen = set()
+_multilingual = []
+for _source in _multilingual_sources:
+    for _char in _source:
+        if _char not in _seen:
+            _seen.add(_char)
+            _multilingual.append(_char)
+VOCABS["multilingual"] = "".join(_multilingual)
+del _multilingual_sources, _seen, _multilingual, _source, _char
 
 default_cfgs: Dict[str, Dict[str, Any]] = {
     "crnn_vgg16_bn": {
@@ -86,3 +94,19 @@ default_cfgs: Dict[str, Dict[str, Any]] = {
         "url": "https://doctr-static.mindee.com/models?id=v0.6.0/crnn_mobilenet_v3_large-cccc50b1.zip&src=0",
     },
 }
+
+
+def index_vocab(vocab: str) -> Dict[str, int]:
+    """Map each character of a vocab to its index, the first occurrence winning like `str.index`"""
+    index: Dict[str, int] = {}
+    for idx, char in enumerate(vocab):
+        index.setdefault(char, idx)
+    return index
+
+
+VOCAB_INDEX: Dict[str, Dict[str, int]] = {name: index_vocab(vocab) for name, vocab in VOCABS.items()}
+
+
+def index_of(vocab_name: str, char: str) -> int:
+    """Index of a character in one of the predefined vocabs"""
+    return VOCAB_INDEX[vocab_name][char]
@@ -1,42 +1,85 @@
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
-from functools import partial
+from functools import lru_cache
 
 import numpy as np
 
+from .config import VOCAB_INDEX, VOCABS, index_vocab
+from .core_fast import NUMBA_AVAILABLE, codepoint_table, encode_sequences_njit
+
 def _addindent(s_, num_spaces):
-    s = s_.split("\n")
+    idx = s_.find("\n")
     # don't do anything for single-line stuff
-    if len(s) == 1:
+    if idx < 0:
         return s_
-    first = s.pop(0)
-    s = [(num_spaces * " ") + line for line in s]
-    s = "\n".join(s)
-    s = first + "\n" + s
-    return s
+    pad = "\n" + num_spaces * " "
+    return s_[:idx] + pad + s_[idx + 1 :].replace("\n", pad)
+
+
+# Precomputed mappings of the predefined vocabs, by vocab string
+_PREDEFINED_INDEX: Dict[str, Dict[str, int]] = {VOCABS[name]: index for name, index in VOCAB_INDEX.items()}
+
+
+@lru_cache(maxsize=32)
+def _vocab_map(vocab: str) -> Dict[str, int]:
+    # Character to index mapping, built once per vocab (predefined vocabs reuse `VOCAB_INDEX`)
+    index = _PREDEFINED_INDEX.get(vocab)
+    return index if index is not None else index_vocab(vocab)
+
+
+# Marks latin-1 characters missing from the vocab in translation tables
+_UNKNOWN = 0xFF
+
+
+@lru_cache(maxsize=32)
+def _latin1_table(vocab: str) -> Optional[bytes]:
+    # Byte translation table for latin-1 vocabs whose indices fit in a byte, None otherwise
+    if len(vocab) >= _UNKNOWN or any(ord(char) > 0xFF for char in vocab):
+        return None
+    mapping = _vocab_map(vocab)
+    return bytes(mapping.get(chr(code), _UNKNOWN) for code in range(256))
+
+
+@lru_cache(maxsize=32)
+def _make_embedding(vocab: str) -> Tuple[str, ...]:
+    # Immutable index to character embedding, shared by all postprocessors of a vocab
+    return tuple(vocab) + ("<eos>",)
+
 
 def encode_string(
     input_string: str,
-    vocab: str,
+    vocab: Union[str, Dict[str, int]],
 ) -> List[int]:
     """Given a predefined mapping, encode the string to a sequence of numbers
 
     Args:
     ----
         input_string: string to encode
-        vocab: vocabulary (string), the encoding is given by the indexing of the character sequence
+        vocab: vocabulary (string), the encoding is given by the indexing of the character sequence.
+            A precomputed character to index mapping (e.g. from `VOCAB_INDEX`) can be passed instead.
 
     Returns:
     -------
         A list encoding the input_string
     """
-    try:
-        return list(map(vocab.index, input_string))
-    except ValueError:
-        raise ValueError(
-            f"some characters cannot be found in 'vocab'. \
+    table = _latin1_table(vocab) if isinstance(vocab, str) else None
+    if table is not None:
+        try:
+            encoded = input_string.encode("latin-1").translate(table)
+        except UnicodeEncodeError:
+            encoded = bytes([_UNKNOWN])
+        if _UNKNOWN not in encoded:
+            return list(encoded)
+    else:
+        mapping = vocab if isinstance(vocab, dict) else _vocab_map(vocab)
+        try:
+            return [mapping[char] for char in input_string]
+        except KeyError:
+            pass
+    raise ValueError(
+        f"some characters cannot be found in 'vocab'. \
                          Please check the input string {input_string} and the vocabulary {vocab}"
-        )
+    )
 
 
 def encode_sequences(
@@ -47,7 +90,8 @@ def encode_sequences(
     sos: Optional[int] = None,
     pad: Optional[int] = None,
     dynamic_seq_length: bool = False,
-) -> np.ndarray:
+    return_lengths: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
     """Encode character sequences using a given vocab as mapping
 
     Args:
@@ -59,25 +103,28 @@ def encode_sequences(
         sos: optional encoding of Start Of String
         pad: optional encoding for padding. In case of padding, all sequences are followed by 1 EOS then PAD
         dynamic_seq_length: if `target_size` is specified, uses it as upper bound and enables dynamic sequence size
+        return_lengths: if True, also returns the length of each sequence
 
     Returns:
     -------
-        the padded encoded data as a tensor
+        the padded encoded data as a tensor, and the sequence lengths if `return_lengths` is set
     """
     if 0 <= eos < len(vocab):
         raise ValueError("argument 'eos' needs to be outside of vocab possible indices")
+    use_sos = isinstance(sos, int)
+    use_pad = isinstance(pad, int)
 
     if not isinstance(target_size, int) or dynamic_seq_length:
         # Maximum string length + EOS
         max_length = max(len(w) for w in sequences) + 1
-        if isinstance(sos, int):
+        if use_sos:
             max_length += 1
-        if isinstance(pad, int):
+        if use_pad:
             max_length += 1
         target_size = max_length if not isinstance(target_size, int) else min(max_length, target_size)
 
     # Pad all sequences
-    if isinstance(pad, int):  # pad with padding symbol
+    if use_pad:  # pad with padding symbol
         if 0 <= pad < len(vocab):
             raise ValueError("argument 'pad' needs to be outside of vocab possible indices")
         # In that case, add EOS at the end of the word before padding
@@ -86,18 +133,41 @@ def encode_sequences(
         default_symbol = eos
     encoded_data: np.ndarray = np.full([len(sequences), target_size], default_symbol, dtype=np.int32)
 
-    # Encode the strings
-    for idx, seq in enumerate(map(partial(encode_string, vocab=vocab), sequences)):
-        if isinstance(pad, int):  # add eos at the end of the sequence
-            seq.append(eos)
-        encoded_data[idx, : min(len(seq), target_size)] = seq[: min(len(seq), target_size)]
-
-    if isinstance(sos, int):  # place sos symbol at the beginning of each sequence
+    if use_sos:  # place sos symbol at the beginning of each sequence
         if 0 <= sos < len(vocab):
             raise ValueError("argument 'sos' needs to be outside of vocab possible indices")
-        encoded_data = np.roll(encoded_data, 1)
         encoded_data[:, 0] = sos
+        # Sequences are written right after the sos column
+        body = encoded_data[:, 1:]
+    else:
+        body = encoded_data
+    body_size = body.shape[1]
 
+    # Encode the strings
+    mapping = _vocab_map(vocab)
+    chars = "".join(sequences)
+    if not mapping.keys() >= set(chars):
+        # Let `encode_string` raise on the first faulty sequence
+        for word in sequences:
+            encode_string(word, vocab)
+    word_lengths = np.fromiter(map(len, sequences), dtype=np.int32, count=len(sequences))
+    lengths = np.minimum(word_lengths, body_size)
+    total = int(lengths.sum())
+    if total < len(chars):  # some sequences need to be truncated
+        chars = "".join(word[:body_size] for word in sequences)
+    table = _latin1_table(vocab)
+    if table is not None:  # single C-level translation of the whole batch
+        codes = np.frombuffer(chars.encode("latin-1").translate(table), dtype=np.uint8).astype(np.int32)
+    else:
+        codes = np.fromiter(map(mapping.__getitem__, chars), dtype=np.int32, count=total)
+    # Row-major boolean mask: the flat buffer is scattered row by row
+    body[np.arange(body_size) < lengths[:, None]] = codes
+    if use_pad:  # add eos at the end of the sequence
+        rows = np.flatnonzero(word_lengths < body_size)
+        body[rows, word_lengths[rows]] = eos
+
+    if return_lengths:
+        return encoded_data, word_lengths
     return encoded_data
 
 
@@ -143,30 +213,68 @@ class NestedObject:
         return main_str
 
 
+def _encode_targets(gts: List[str], vocab: str, max_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    if NUMBA_AVAILABLE and codepoint_table(vocab) is not None:
+        return encode_sequences_njit(gts, vocab, target_size=max_length, eos=len(vocab), return_lengths=True)
+    return encode_sequences(sequences=gts, vocab=vocab, target_size=max_length, eos=len(vocab), return_lengths=True)
+
+
+def _encode_shared_targets(gts: Tuple[str, ...], vocab: str, max_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    encoded, seq_len = _encode_targets(list(gts), vocab, max_length)
+    # Cached results are shared between calls
+    encoded.flags.writeable = False
+    seq_len.flags.writeable = False
+    return encoded, seq_len
+
+
+# Default number of distinct ground-truth batches kept when caching targets, enough for a typical eval set
+TARGET_CACHE_SIZE = 1024
+
+_cached_targets = lru_cache(maxsize=TARGET_CACHE_SIZE)(_encode_shared_targets)
+
+
+def set_target_cache_size(maxsize: Optional[int]) -> None:
+    """Resize (and clear) the cache of encoded targets used when `cache_targets` is set
+
+    Args:
+    ----
+        maxsize: maximum number of distinct ground-truth batches to keep, unbounded if None
+    """
+    global _cached_targets
+    _cached_targets = lru_cache(maxsize=maxsize)(_encode_shared_targets)
+
+
 class RecognitionModel(NestedObject):
     """Implements abstract RecognitionModel class"""
 
     vocab: str
     max_length: int
+    cache_targets: bool = False
 
     def build_target(
         self,
         gts: List[str],
-    ) -> Tuple[np.ndarray, List[int]]:
+        cache_targets: Optional[bool] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """Encode a list of gts sequences into a np array and gives the corresponding*
         sequence lengths.
 
         Args:
         ----
             gts: list of ground-truth labels
+            cache_targets: if True, reuses the encoding of identical batches (e.g. evaluation sets across epochs).
+                The returned arrays are then shared between calls and read-only. Defaults to the model's
+                `cache_targets` attribute. See `set_target_cache_size` for the number of batches kept.
 
         Returns:
         -------
             A tuple of 2 tensors: Encoded labels and sequence lengths (for each entry of the batch)
         """
-        encoded = encode_sequences(sequences=gts, vocab=self.vocab, target_size=self.max_length, eos=len(self.vocab))
-        seq_len = [len(word) for word in gts]
-        return encoded, seq_len
+        if cache_targets is None:
+            cache_targets = self.cache_targets
+        if cache_targets:
+            return _cached_targets(tuple(gts), self.vocab, self.max_length)
+        return _encode_targets(gts, self.vocab, self.max_length)
 
 
 class RecognitionPostProcessor(NestedObject):
@@ -182,7 +290,7 @@ class RecognitionPostProcessor(NestedObject):
         vocab: str,
     ) -> None:
         self.vocab = vocab
-        self._embedding = list(self.vocab) + ["<eos>"]
+        self._embedding = _make_embedding(vocab)
 
     def extra_repr(self) -> str:
         return f"vocab_size={len(self.vocab)}"
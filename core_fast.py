@@ -0,0 +1,108 @@
+from typing import List, Optional, Tuple, Union
+
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, callers fall back to the numpy encoder
+    njit = None
+
+__all__ = ["NUMBA_AVAILABLE", "codepoint_table", "encode_sequences_njit"]
+
+NUMBA_AVAILABLE = njit is not None
+
+# Vocabs with code points beyond this bound are not worth a direct lookup table
+MAX_CODEPOINT = 0x20000
+
+
+@lru_cache(maxsize=32)
+def codepoint_table(vocab: str) -> Optional[np.ndarray]:
+    """Build a lookup table mapping each code point to its index in the vocab (-1 if absent)
+
+    Args:
+    ----
+        vocab: vocabulary (string), the encoding is given by the indexing of the character sequence
+
+    Returns:
+    -------
+        the int32 lookup table, or None if the vocab holds code points beyond `MAX_CODEPOINT`
+    """
+    max_cp = max(map(ord, vocab), default=0)
+    if max_cp >= MAX_CODEPOINT:
+        return None
+    table = np.full(max_cp + 1, -1, dtype=np.int32)
+    # Reversed so that the first occurrence wins, like `str.index`
+    for idx in range(len(vocab) - 1, -1, -1):
+        table[ord(vocab[idx])] = idx
+    table.flags.writeable = False
+    return table
+
+
+def _raise_encoding_error(sequences: List[str], vocab: str) -> None:
+    # Deferred import: `core` depends on this module
+    from .core import encode_string
+
+    # Let `encode_string` raise on the first faulty sequence, like the numpy encoder
+    for word in sequences:
+        encode_string(word, vocab)
+
+
+if NUMBA_AVAILABLE:
+
+    @njit
+    def encode_njit(
+        codepoints: np.ndarray, offsets: np.ndarray, table: np.ndarray, out: np.ndarray, eos: np.int32
+    ) -> int:
+        # Returns the index of the first sequence holding an out-of-vocab character, -1 otherwise
+        target_size = out.shape[1]
+        for row in range(offsets.shape[0] - 1):
+            start, end = offsets[row], offsets[row + 1]
+            for col in range(end - start):
+                cp = codepoints[start + col]
+                if cp >= table.shape[0] or table[cp] < 0:
+                    return row
+                if col < target_size:
+                    out[row, col] = table[cp]
+            if end - start < target_size:
+                out[row, end - start] = eos
+        return -1
+
+
+def encode_sequences_njit(
+    sequences: List[str],
+    vocab: str,
+    target_size: int,
+    eos: int,
+    return_lengths: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Encode character sequences into a fixed-size array, padded with EOS, using the compiled encoder
+
+    Args:
+    ----
+        sequences: the list of character sequences of size N
+        vocab: the ordered vocab to use for encoding, whose `codepoint_table` must be available
+        target_size: length of the encoded data
+        eos: encoding of End Of String, also used for padding
+        return_lengths: if True, also returns the length of each sequence
+
+    Returns:
+    -------
+        the padded encoded data as a tensor, and the sequence lengths if `return_lengths` is set
+    """
+    table = codepoint_table(vocab)
+    try:
+        codepoints = np.frombuffer("".join(sequences).encode("utf-32-le"), dtype=np.uint32)
+    except UnicodeEncodeError:  # lone surrogates cannot be in the vocab either
+        _raise_encoding_error(sequences, vocab)
+    lengths = np.fromiter(map(len, sequences), dtype=np.int32, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    encoded_data = np.full([len(sequences), target_size], eos, dtype=np.int32)
+    faulty = encode_njit(codepoints, offsets, table, encoded_data, np.int32(eos))
+    if faulty >= 0:
+        _raise_encoding_error(sequences[faulty : faulty + 1], vocab)
+    if return_lengths:
+        return encoded_data, lengths
+    return encoded_data
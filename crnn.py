@@ -5,7 +5,7 @@ from tensorflow.keras import layers
 from tensorflow.keras.models import Model, Sequential
 
 from .config import default_cfgs
-from .utils import load_pretrained_params, _bf16_to_float32
+from .utils import load_pretrained_params
 
 from .core import RecognitionPostProcessor, RecognitionModel
 from .vgg_16 import vgg16_bn_r
@@ -90,6 +90,7 @@ class CRNN(RecognitionModel, Model):
         beam_width: beam width for beam search decoding
         top_paths: number of top paths for beam search decoding
         cfg: configuration dictionary
+        cache_targets: reuse the encoded targets of identical ground-truth batches when computing the loss
     """
 
     _children_names: List[str] = ["feat_extractor", "decoder", "postprocessor"]
@@ -103,6 +104,7 @@ class CRNN(RecognitionModel, Model):
         beam_width: int = 1,
         top_paths: int = 1,
         cfg: Optional[Dict[str, Any]] = None,
+        cache_targets: bool = False,
     ) -> None:
         # Initialize kernels
         h, w, c = feature_extractor.output_shape[1:]
@@ -112,12 +114,15 @@ class CRNN(RecognitionModel, Model):
         self.max_length = w
         self.cfg = cfg
         self.exportable = exportable
+        self.cache_targets = cache_targets
         self.feat_extractor = feature_extractor
 
         self.decoder = Sequential([
             layers.Bidirectional(layers.LSTM(units=rnn_units, return_sequences=True)),
             layers.Bidirectional(layers.LSTM(units=rnn_units, return_sequences=True)),
             layers.Dense(units=len(vocab) + 1),
+            # Cast the logits back to float32 within the graph (no-op unless running in bfloat16)
+            layers.Activation("linear", dtype="float32"),
         ])
         self.decoder.build(input_shape=(None, w, h * c))
 
@@ -169,7 +174,7 @@ class CRNN(RecognitionModel, Model):
         w, h, c = transposed_feat.get_shape().as_list()[1:]
         # B x W x H x C --> B x W x H * C
         features_seq = tf.reshape(transposed_feat, shape=(-1, w, h * c))
-        logits = _bf16_to_float32(self.decoder(features_seq, **kwargs))
+        logits = self.decoder(features_seq, **kwargs)
 
         out: Dict[str, tf.Tensor] = {}
         if self.exportable:
@@ -215,7 +220,7 @@ def _crnn(
     model = CRNN(feat_extractor, cfg=_cfg, **kwargs)
     # Load pretrained parameters
     if pretrained:
-        load_pretrained_params(model, _cfg["url"])
+        load_pretrained_params(model, _cfg["url"], input_shape=_cfg["input_shape"])
 
     return model
 
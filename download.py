@@ -18,20 +18,24 @@ HASH_REGEX = re.compile(r"-([a-f0-9]*)\.")
 USER_AGENT = "mindee/doctr"
 
 
-def _urlretrieve(url: str, filename: Union[Path, str], chunk_size: int = 1024) -> None:
+def _urlretrieve(url: str, filename: Union[Path, str], chunk_size: int = 1 << 20) -> None:
     with open(filename, "wb") as fh:
         with urllib.request.urlopen(urllib.request.Request(url, headers={"User-Agent": USER_AGENT})) as response:
             with tqdm(total=response.length) as pbar:
                 for chunk in iter(lambda: response.read(chunk_size), ""):
                     if not chunk:
                         break
-                    pbar.update(chunk_size)
+                    pbar.update(len(chunk))
                     fh.write(chunk)
 
 
-def _check_integrity(file_path: Union[str, Path], hash_prefix: str) -> bool:
+def _check_integrity(file_path: Union[str, Path], hash_prefix: str, chunk_size: int = 1 << 20) -> bool:
+    # Hash in large chunks: keeps memory bounded while letting hashlib run its accelerated rounds
+    sha = hashlib.sha256()
     with open(file_path, "rb") as f:
-        sha_hash = hashlib.sha256(f.read()).hexdigest()
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    sha_hash = sha.hexdigest()
 
     return sha_hash[: len(hash_prefix)] == hash_prefix
 
@@ -0,0 +1,11 @@
+import importlib.machinery
+import importlib.util
+import sys
+from pathlib import Path
+
+# The modules use relative imports: expose the repository root as an importable package
+PACKAGE = "export_doctr_model"
+
+_spec = importlib.machinery.ModuleSpec(PACKAGE, None, is_package=True)
+_spec.submodule_search_locations = [str(Path(__file__).resolve().parents[1])]
+sys.modules.setdefault(PACKAGE, importlib.util.module_from_spec(_spec))
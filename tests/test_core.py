@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pytest
+
+from export_doctr_model.config import VOCABS
+from export_doctr_model import core
+from export_doctr_model.core import RecognitionModel, encode_sequences, set_target_cache_size
+from export_doctr_model.core_fast import NUMBA_AVAILABLE, codepoint_table, encode_sequences_njit
+
+
+class _Model(RecognitionModel):
+    def __init__(self, vocab, max_length):
+        self.vocab = vocab
+        self.max_length = max_length
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed")
+@pytest.mark.parametrize("vocab_name", ["latin", "french", "vietnamese", "multilingual", "arabic"])
+def test_encode_sequences_njit(vocab_name):
+    vocab = VOCABS[vocab_name]
+    assert codepoint_table(vocab) is not None
+    rng = random.Random(0)
+    for _ in range(300):
+        sequences = [
+            "".join(rng.choice(vocab) for _ in range(rng.randint(0, 40))) for _ in range(rng.randint(0, 8))
+        ]
+        target_size = rng.randint(1, 32)
+        encoded, lengths = encode_sequences_njit(
+            sequences, vocab, target_size=target_size, eos=len(vocab), return_lengths=True
+        )
+        ref_encoded, ref_lengths = encode_sequences(
+            sequences, vocab, target_size=target_size, eos=len(vocab), return_lengths=True
+        )
+        assert encoded.dtype == ref_encoded.dtype
+        assert np.array_equal(encoded, ref_encoded)
+        assert np.array_equal(lengths, ref_lengths)
+
+
+@pytest.mark.parametrize("word", ["a\ud800", "a\U0001F600", "a€b\x00"])
+def test_build_target_errors(word):
+    vocab = VOCABS["latin"]
+    with pytest.raises(ValueError, match="some characters cannot be found in 'vocab'") as exc_info:
+        _Model(vocab, 8).build_target(["ab", word])
+    with pytest.raises(ValueError) as ref_info:
+        encode_sequences(["ab", word], vocab, target_size=8, eos=len(vocab))
+    assert str(exc_info.value) == str(ref_info.value)
+
+
+def test_build_target_cache():
+    model = _Model(VOCABS["french"], 8)
+    gts = ["hello", "world"]
+    encoded, seq_len = model.build_target(gts)
+    assert encoded.flags.writeable and seq_len.flags.writeable
+    assert model.build_target(gts)[0] is not encoded
+
+    cached, cached_len = model.build_target(gts, cache_targets=True)
+    assert model.build_target(list(gts), cache_targets=True)[0] is cached
+    assert not cached.flags.writeable and not cached_len.flags.writeable
+    assert np.array_equal(cached, encoded) and np.array_equal(cached_len, seq_len)
+
+    # The cache key follows the model configuration
+    model.max_length = 10
+    assert model.build_target(gts, cache_targets=True)[0].shape == (2, 10)
+
+
+def test_build_target_cache_eval_epochs():
+    model = _Model(VOCABS["french"], 8)
+    model.cache_targets = True
+    rng = random.Random(0)
+    vocab = VOCABS["french"]
+    batches = [["".join(rng.choice(vocab) for _ in range(6)) for _ in range(4)] for _ in range(40)]
+    set_target_cache_size(core.TARGET_CACHE_SIZE)
+    # Three epochs over an eval set larger than a small cache: only the first one encodes
+    for _ in range(3):
+        for gts in batches:
+            assert not model.build_target(gts)[0].flags.writeable
+    info = core._cached_targets.cache_info()
+    assert (info.hits, info.misses) == (80, 40)
+    # The explicit argument overrides the model attribute
+    assert model.build_target(batches[0], cache_targets=False)[0].flags.writeable
+
+    set_target_cache_size(16)
+    for _ in range(2):
+        for gts in batches:
+            model.build_target(gts)
+    assert core._cached_targets.cache_info().hits == 0
+    set_target_cache_size(core.TARGET_CACHE_SIZE)
@@ -0,0 +1,42 @@
+import zipfile
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from export_doctr_model import utils  # noqa: E402
+
+
+class _Model(tf.keras.Model):
+    # Like CRNN: sub-models are built in __init__, the model itself is not
+    def __init__(self):
+        super().__init__()
+        self.head = tf.keras.Sequential([tf.keras.layers.Dense(4)])
+        self.head.build((None, 3))
+
+    def call(self, x, **kwargs):
+        return self.head(x, **kwargs)
+
+
+def test_load_pretrained_params_prepack(tmp_path, monkeypatch):
+    src = _Model()
+    src(tf.zeros([1, 3]))
+    ckpt_dir = tmp_path.joinpath("ckpt")
+    src.save_weights(str(ckpt_dir.joinpath("weights")))
+    archive_path = tmp_path.joinpath("params-abcdef.zip")
+    with zipfile.ZipFile(archive_path, "w") as f:
+        for file in ckpt_dir.iterdir():
+            f.write(file, arcname=file.name)
+
+    monkeypatch.setenv("DOCTR_PREPACK", "1")
+    monkeypatch.setattr(utils, "download_from_url", lambda *args, **kwargs: archive_path)
+    prepacked_path = tmp_path.joinpath("params-abcdef", "weights.h5")
+
+    # First load reads the checkpoint and writes the prepacked copy, the second one reads it back
+    for _ in range(2):
+        model = _Model()
+        utils.load_pretrained_params(model, "https://yoursource.com/params-abcdef.zip", input_shape=(3,))
+        assert prepacked_path.is_file()
+        for weight, ref in zip(model.get_weights(), src.get_weights()):
+            assert np.array_equal(weight, ref)
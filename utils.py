@@ -1,15 +1,36 @@
-from typing import Any, Callable, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple, Union
 import logging
+from pathlib import Path
 from zipfile import ZipFile
 import os
+import shutil
 
-import tensorflow as tf
-from tensorflow.keras import Model, layers
 from .download import download_from_url
 
-def _bf16_to_float32(x: tf.Tensor) -> tf.Tensor:
-    # Convert bfloat16 to float32 for numpy compatibility
-    return tf.cast(x, tf.float32) if x.dtype == tf.bfloat16 else x
+if TYPE_CHECKING:
+    # TensorFlow is only imported when actually needed, to keep this module cheap to import
+    from tensorflow.keras import Model, layers
+
+def _extract_archive(archive_path: Path, params_path: Path, chunk_size: int = 1 << 20) -> None:
+    # Stream each member to disk with a fixed-size buffer
+    root = params_path.resolve()
+    with ZipFile(archive_path, "r") as f:
+        for info in f.infolist():
+            target = root.joinpath(info.filename).resolve()
+            if root != target and root not in target.parents:
+                raise ValueError(f"unsafe path in archive {archive_path}: {info.filename}")
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with f.open(info) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, length=chunk_size)
+
+def _build_model(model: "Model", input_shape: Tuple[int, int, int]) -> None:
+    # Subclassed models only create all their variables on their first call
+    import tensorflow as tf
+
+    model(tf.zeros([1, *input_shape], dtype=tf.float32), training=False)
 
 def conv_sequence(
     out_channels: int,
@@ -18,7 +39,7 @@ def conv_sequence(
     padding: str = "same",
     kernel_initializer: str = "he_normal",
     **kwargs: Any,
-) -> List[layers.Layer]:
+) -> List["layers.Layer"]:
     """Builds a convolutional-based layer sequence
 
     >>> from tensorflow.keras import Sequential
@@ -38,6 +59,8 @@ def conv_sequence(
     -------
         list of layers
     """
+    from tensorflow.keras import layers
+
     # No bias before Batch norm
     kwargs["use_bias"] = kwargs.get("use_bias", not bn)
     # Add activation directly to the conv if there is no BN
@@ -56,11 +79,12 @@ def conv_sequence(
 
 
 def load_pretrained_params(
-    model: Model,
+    model: "Model",
     url: Optional[str] = None,
     hash_prefix: Optional[str] = None,
     overwrite: bool = False,
     internal_name: str = "weights",
+    input_shape: Optional[Tuple[int, int, int]] = None,
     **kwargs: Any,
 ) -> None:
     """Load a set of parameters onto a model
@@ -75,7 +99,15 @@ def load_pretrained_params(
         hash_prefix: first characters of SHA256 expected hash
         overwrite: should the zip extraction be enforced if the archive has already been extracted
         internal_name: name of the ckpt files
+        input_shape: shape of a single input (H, W, C), used to build a subclassed model before prepacking
         **kwargs: additional arguments to be passed to `doctr.utils.data.download_from_url`
+
+    Note:
+    ----
+        Setting the `DOCTR_PREPACK=1` environment variable keeps a single-file HDF5 copy of the weights next to
+        the extracted checkpoint after the first load, and loads from it on subsequent calls. HDF5 weights can only
+        be loaded onto a built model: unbuilt models are first called once on zeros of shape `input_shape`, and
+        keep loading the checkpoint if no `input_shape` is given.
     """
     if url is None:
         logging.warning("Invalid model URL, using default initialization.")
@@ -85,8 +117,17 @@ def load_pretrained_params(
         # Unzip the archive
         params_path = archive_path.parent.joinpath(archive_path.stem)
         if not params_path.is_dir() or overwrite:
-            with ZipFile(archive_path, "r") as f:
-                f.extractall(path=params_path)
+            _extract_archive(archive_path, params_path)
+
+        prepacked_path = params_path.joinpath(f"{internal_name}.h5")
+        prepack = os.environ.get("DOCTR_PREPACK", "") == "1" and (model.built or input_shape is not None)
+        if prepack and not model.built:
+            _build_model(model, input_shape)
+        if prepack and prepacked_path.is_file() and not overwrite:
+            model.load_weights(str(prepacked_path))
+            return
 
         # Load weights
         model.load_weights(f"{params_path}{os.sep}{internal_name}")
+        if prepack:
+            model.save_weights(str(prepacked_path))